@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+    gene.script.output
+    ~~~~~~~~~~~~~~~~~~
+
+    Output backends for generator.
+
+      - FileSystemOutput: Write to real filesystem
+      - MemoryOutput: Keep files in dict
+      - TarOutput: Stream tar archive to file object
+      - ZipOutput: Stream zip archive to file object
+
+    Every backend takes `/` separated names relative to output root.
+
+    :copyright: (c) 2016 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import io
+import stat
+import time
+import shutil
+import tarfile
+import zipfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    #: Windows does not have fcntl.
+    fcntl = None
+
+#: ioctl request number of `FICLONE`.
+FICLONE = 0x40049409
+
+#: Binary assets which are replaced rather than edited, so only they could
+#: be hardlinked. Editing a hardlinked file in place edits the template.
+LINKABLE = frozenset(['.png', '.jpg', '.jpeg', '.gif', '.ico', '.eot',
+                      '.ttf', '.otf', '.woff', '.woff2'])
+
+
+def reflink(src, dst):
+    """
+    Clone file by `FICLONE` ioctl.
+
+    Only works on copy-on-write filesystem (Btrfs, XFS).
+
+    :param src: Source file
+    :param dst: Destination file
+    """
+    if fcntl is None:
+        return False
+
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            return True
+        except (IOError, OSError):
+            return False
+
+
+def copy_file_range(src, dst, size):
+    """
+    Copy file in kernel by `os.copy_file_range()`.
+
+    :param src: Source file
+    :param dst: Destination file
+    :param size: File size
+    """
+    if not hasattr(os, 'copy_file_range'):
+        return False
+
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            while size > 0:
+                copied = os.copy_file_range(s.fileno(), d.fileno(), size)
+                if copied == 0:
+                    break
+                size -= copied
+        except OSError:
+            return False
+
+    return size == 0
+
+
+def sendfile(src, dst, size):
+    """
+    Copy file in kernel by `os.sendfile()`.
+
+    :param src: Source file
+    :param dst: Destination file
+    :param size: File size
+    """
+    if not hasattr(os, 'sendfile'):
+        return False
+
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(d.fileno(), s.fileno(), offset,
+                                   size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            return False
+
+    return offset == size
+
+
+def is_linkable(name):
+    """
+    Check is file safe to hardlink.
+
+    :param name: File name
+    """
+    return os.path.splitext(name)[1].lower() in LINKABLE
+
+
+class FileSystemOutput(object):
+    def __init__(self, root, link=False):
+        """
+        Initialize.
+
+        :param root: Output root directory
+        :param link: Hardlink binary assets instead of copy. Linked files
+                     share inode with templates, so it is unsafe to edit
+                     them in place.
+        """
+        self.root = root
+        self.link = link
+
+    def path(self, name):
+        """
+        Build real path.
+
+        :param name: File name
+        """
+        return os.path.join(self.root, *name.split('/'))
+
+    def exists(self, name):
+        """
+        Check is file/directory exists.
+
+        :param name: File name
+        """
+        return os.path.exists(self.path(name))
+
+    def makedirs(self, name):
+        """
+        Create directory.
+
+        :param name: Directory name
+        """
+        path = self.path(name)
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def read(self, name):
+        """
+        Read file.
+
+        :param name: File name
+        """
+        with open(self.path(name), 'rb') as f:
+            return f.read()
+
+    def write(self, name, data, mode=None):
+        """
+        Write file.
+
+        :param name: File name
+        :param data: Bytes
+        :param mode: File mode
+        """
+        path = self.path(name)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        if mode is not None:
+            os.chmod(path, stat.S_IMODE(mode))
+
+    def copy(self, src, name):
+        """
+        Copy static file.
+
+        Try hardlink (if `link` enabled and file is binary asset), reflink,
+        `os.copy_file_range()`, `os.sendfile()` and fallback to
+        `shutil.copyfile()`.
+
+        :param src: Source file
+        :param name: File name
+        """
+        dst = self.path(name)
+        size = os.path.getsize(src)
+        if self.link and is_linkable(name):
+            try:
+                os.link(src, dst)
+                return 'linked', size
+            except (AttributeError, OSError):
+                pass
+
+        if reflink(src, dst):
+            kind = 'linked'
+        else:
+            kind = 'copied'
+            if not copy_file_range(src, dst, size) and \
+                    not sendfile(src, dst, size):
+                shutil.copyfile(src, dst)
+
+        shutil.copystat(src, dst)
+
+        return kind, size
+
+    def close(self):
+        pass
+
+
+class MemoryOutput(object):
+    def __init__(self):
+        """ Initialize. """
+        self.files = {}
+        self.modes = {}
+        self.dirs = set()
+
+    def exists(self, name):
+        """
+        Check is file/directory exists.
+
+        :param name: File name
+        """
+        return name in self.files or name in self.dirs
+
+    def makedirs(self, name):
+        """
+        Create directory.
+
+        :param name: Directory name
+        """
+        items = name.split('/')
+        for i in range(1, len(items) + 1):
+            self.dirs.add('/'.join(items[:i]))
+
+    def read(self, name):
+        """
+        Read file.
+
+        :param name: File name
+        """
+        return self.files[name]
+
+    def write(self, name, data, mode=None):
+        """
+        Write file.
+
+        :param name: File name
+        :param data: Bytes
+        :param mode: File mode
+        """
+        self.files[name] = data
+        if mode is not None:
+            self.modes[name] = stat.S_IMODE(mode)
+
+    def copy(self, src, name):
+        """
+        Copy static file.
+
+        :param src: Source file
+        :param name: File name
+        """
+        with open(src, 'rb') as f:
+            data = f.read()
+
+        self.write(name, data, os.stat(src).st_mode)
+
+        return 'copied', len(data)
+
+    def close(self):
+        pass
+
+
+class ArchiveOutput(MemoryOutput):
+    def __init__(self, fileobj):
+        """
+        Initialize.
+
+        Archive can only append, so keep names to answer `exists()`.
+        Writes are serialized by lock to use from parallel jobs.
+
+        :param fileobj: File object to write archive
+        """
+        super(ArchiveOutput, self).__init__()
+        self.fileobj = fileobj
+        self.lock = threading.Lock()
+        self.mtime = time.time()
+
+    def makedirs(self, name):
+        """
+        Add directory entries.
+
+        :param name: Directory name
+        """
+        items = name.split('/')
+        with self.lock:
+            for i in range(1, len(items) + 1):
+                path = '/'.join(items[:i])
+                if path not in self.dirs:
+                    self.dirs.add(path)
+                    self.add_dir(path)
+
+    def read(self, name):
+        """
+        Archive is write only.
+
+        :param name: File name
+        """
+        raise IOError('{0} can not read from archive'.format(name))
+
+    def write(self, name, data, mode=None):
+        """
+        Add file entry.
+
+        :param name: File name
+        :param data: Bytes
+        :param mode: File mode
+        """
+        if mode is None:
+            mode = 0o644
+
+        with self.lock:
+            self.files[name] = None
+            self.add_file(name, data, stat.S_IMODE(mode))
+
+
+class TarOutput(ArchiveOutput):
+    def __init__(self, fileobj):
+        """
+        Initialize.
+
+        :param fileobj: File object to write tar stream
+        """
+        super(TarOutput, self).__init__(fileobj)
+        self.tar = tarfile.open(fileobj=fileobj, mode='w|')
+
+    def add_dir(self, name):
+        info = tarfile.TarInfo(name)
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+        info.mtime = self.mtime
+        self.tar.addfile(info)
+
+    def add_file(self, name, data, mode):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mode = mode
+        info.mtime = self.mtime
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.tar.close()
+
+
+class ZipOutput(ArchiveOutput):
+    def __init__(self, fileobj):
+        """
+        Initialize.
+
+        :param fileobj: File object to write zip stream
+        """
+        super(ZipOutput, self).__init__(fileobj)
+        self.zip = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+
+    def add_dir(self, name):
+        info = zipfile.ZipInfo(name + '/', time.localtime(self.mtime)[:6])
+        info.external_attr = (stat.S_IFDIR | 0o755) << 16
+        self.zip.writestr(info, b'')
+
+    def add_file(self, name, data, mode):
+        info = zipfile.ZipInfo(name, time.localtime(self.mtime)[:6])
+        info.external_attr = (stat.S_IFREG | mode) << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.zip.writestr(info, data)
+
+    def close(self):
+        self.zip.close()
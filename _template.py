@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+    gene.script.template
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Compiled template engine.
+
+    A template is parsed once into a list of segments.
+    Even indexes are literal strings, odd indexes are variable names.
+    So rendering is a single join instead of one `str.replace` per variable.
+
+    Compiled segments are cached in memory and optionally on disk,
+    keyed by the template path relative to templates directory and the
+    sha1 of the template content. Disk cache is used only if `cache_dir`
+    (or `GENE_CACHE_DIR` of generator) is set.
+
+    :copyright: (c) 2016 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import re
+import io
+import json
+import hashlib
+import tempfile
+
+#: Template variable {{foo}}
+VARIABLE = re.compile(r'\{\{(\w+)\}\}')
+
+#: Bump when format of cached segments changed.
+CACHE_VERSION = 1
+
+
+def compile_template(source):
+    """
+    Compile template source to segments.
+
+    :param source: Template source
+    """
+    return VARIABLE.split(source)
+
+
+def render_segments(segments, context):
+    """
+    Render compiled segments.
+
+    Unknown variables are left as it is.
+
+    :param segments: Compiled segments
+    :param context: Template vars
+    """
+    parts = list(segments)
+    for i in range(1, len(parts), 2):
+        name = parts[i]
+        if name in context:
+            parts[i] = context[name]
+        else:
+            parts[i] = '{{' + name + '}}'
+
+    return ''.join(parts)
+
+
+def digest(data):
+    """
+    Calculate sha1 hex digest.
+
+    :param data: Bytes
+    """
+    return hashlib.sha1(data).hexdigest()
+
+
+def build_key(path, data):
+    """
+    Build cache key from template path and content.
+
+    :param path: Template path relative to templates directory
+    :param data: Template content bytes
+    """
+    return digest(path.replace(os.sep, '/').encode('utf-8') + b'\0' + data)
+
+
+class TemplateCache(object):
+    def __init__(self, cache_dir=None):
+        """
+        Initialize.
+
+        :param cache_dir: Directory to store compiled templates.
+                          If None, cache only in memory.
+        """
+        self.cache_dir = cache_dir
+        self.templates = {}
+
+    def cache_path(self, key):
+        """
+        Build path to cache file.
+
+        :param key: Cache key
+        """
+        return os.path.join(self.cache_dir, '{0}.json'.format(key))
+
+    def load(self, key):
+        """
+        Load compiled segments from disk.
+
+        :param key: Cache key
+        """
+        if self.cache_dir is None:
+            return None
+
+        try:
+            with io.open(self.cache_path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if data.get('version') != CACHE_VERSION:
+            return None
+
+        return data['segments']
+
+    def dump(self, key, path, segments):
+        """
+        Store compiled segments to disk.
+
+        Write to temporary file and rename it,
+        so concurrent generators never read a partial file.
+
+        :param key: Cache key
+        :param path: Template path
+        :param segments: Compiled segments
+        """
+        if self.cache_dir is None:
+            return
+
+        data = {'version': CACHE_VERSION, 'path': path, 'segments': segments}
+        try:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+            with io.open(fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False))
+            os.rename(tmp, self.cache_path(key))
+        except (IOError, OSError):
+            #: Cache is optional, rendering should not fail.
+            pass
+
+    def get(self, path, data):
+        """
+        Get compiled segments.
+
+        :param path: Template path relative to templates directory
+        :param data: Template content bytes
+        """
+        key = build_key(path, data)
+        segments = self.templates.get(key)
+        if segments is not None:
+            return segments
+
+        segments = self.load(key)
+        if segments is None:
+            segments = compile_template(data.decode('utf-8'))
+            self.dump(key, path, segments)
+
+        self.templates[key] = segments
+
+        return segments
+
+    def render(self, path, data, context):
+        """
+        Render template content.
+
+        :param path: Template path relative to templates directory
+        :param data: Template content bytes
+        :param context: Template vars
+        """
+        return render_segments(self.get(path, data), context)
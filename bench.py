@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    gene.script.bench
+    ~~~~~~~~~~~~~~~~~
+
+    Benchmarks for Flask project generator.
+
+    Measure wall time, files/sec, bytes written and peak memory of
+    `create_project()`, `build_tree()` + `generate()`, `render_file()` and
+    `create_file()` against bundled templates and synthetic templates.
+
+    .. code::
+
+      $ python bench.py --save var/bench/before.json
+      $ python bench.py --compare var/bench/before.json
+
+    :copyright: (c) 2016 Shinya Ohyanagi, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+import io
+import os
+import sys
+import json
+import random
+import shutil
+import platform
+import tempfile
+from datetime import datetime
+from argparse import ArgumentParser
+from timeit import default_timer
+from manage import Generator, output, green, grey, red
+
+try:
+    import tracemalloc
+except ImportError:
+    #: Python2 can not measure peak memory.
+    tracemalloc = None
+
+#: Bump when format of results changed.
+RESULT_VERSION = 1
+
+#: Template variables used in synthetic templates.
+VARIABLES = ['package', 'separator', 'project', 'project_upper',
+             'project_title', 'year', 'author']
+
+HEADER = '''# -*- coding: utf-8 -*-
+"""
+    {{package}}
+    {{separator}}
+
+    :copyright: (c) {{year}} {{author}}, All rights reserved.
+    :license: BSD, see LICENSE for more details.
+"""
+'''
+
+
+def build_template(size, seed=0):
+    """
+    Build synthetic template.
+
+    :param size: Approximate template size in bytes
+    :param seed: Random seed
+    """
+    rand = random.Random(seed)
+    lines = [HEADER]
+    length = len(HEADER)
+    while length < size:
+        var = rand.choice(VARIABLES)
+        line = 'value_{0} = "{{{{{1}}}}}"  # {2}\n'.format(
+            rand.randint(0, 1 << 16), var, 'x' * rand.randint(0, 40)
+        )
+        lines.append(line)
+        length += len(line)
+
+    return ''.join(lines)
+
+
+def build_tree(path, count, size, depth=3):
+    """
+    Build synthetic template tree.
+
+    :param path: Directory to create tree
+    :param count: Number of templates
+    :param size: Template size in bytes
+    :param depth: Directory depth
+    """
+    for i in range(count):
+        dirs = ['pkg{0}'.format((i >> n) % 4) for n in range(depth)]
+        root = os.path.join(path, *dirs)
+        if not os.path.exists(root):
+            os.makedirs(root)
+        fname = os.path.join(root, 'module{0}.py_tmpl'.format(i))
+        with io.open(fname, 'w', encoding='utf-8') as f:
+            f.write(build_template(size, seed=i))
+
+
+def measure_tree(path):
+    """
+    Count files and bytes in directory.
+
+    :param path: Directory
+    """
+    files = 0
+    size = 0
+    for root, dirs, fnames in os.walk(path):
+        for fname in fnames:
+            files += 1
+            size += os.path.getsize(os.path.join(root, fname))
+
+    return files, size
+
+
+class Benchmark(object):
+    def __init__(self, repeat=5, jobs=1):
+        """
+        Initialize.
+
+        :param repeat: Number of runs per scenario
+        :param jobs: Number of parallel jobs for generator
+        """
+        self.repeat = repeat
+        self.jobs = jobs
+        self.work_path = tempfile.mkdtemp(prefix='gene-bench-')
+        self.data_path = os.path.join(self.work_path, 'data')
+        os.makedirs(self.data_path)
+
+    def generator(self, path):
+        """
+        Create generator which year and author are fixed.
+
+        :param path: Output path
+        """
+        gen = Generator(path, author='bench', jobs=self.jobs)
+        gen.year = '2016'
+
+        return gen
+
+    def create_project(self, path):
+        gen = self.generator(path)
+        gen.create_project('benchproject')
+
+    def generate(self, path, tmpl_path):
+        gen = self.generator(path)
+        gen.tmpl_path = tmpl_path
+        gen.generate(gen.build_tree('benchproject', 'app', 'benchproject'))
+
+    def render_file(self, path, src):
+        self.generator(path).render_file(src, 'large.py', {
+            'project': 'benchproject',
+            'package': 'benchproject.large',
+            'separator': '~' * 18,
+            'year': '2016',
+            'author': 'bench'
+        })
+
+    def create_file(self, path, count):
+        gen = self.generator(path)
+        os.makedirs(os.path.join(path, 'benchproject', 'views'))
+        for i in range(count):
+            gen.create_file('benchproject', 'api/v{0}/resource{1}'.format(
+                i % 8, i), 'views')
+
+    def scenarios(self):
+        """ Build scenarios. """
+        large = os.path.join(self.data_path, 'large.py_tmpl')
+        with io.open(large, 'w', encoding='utf-8') as f:
+            f.write(build_template(4 * 1024 * 1024))
+
+        synthetic = {}
+        for count, size in [(100, 4 * 1024), (1000, 4 * 1024),
+                            (100, 256 * 1024)]:
+            name = 'tree-{0}x{1}k'.format(count, size // 1024)
+            path = os.path.join(self.data_path, name)
+            build_tree(os.path.join(path, 'app'), count, size)
+            synthetic[name] = path
+
+        scenarios = [
+            ('create_project', self.create_project, ()),
+            ('render_file-4m', self.render_file, (large,)),
+            ('create_file-200', self.create_file, (200,)),
+        ]
+        for name in sorted(synthetic):
+            path = synthetic[name]
+            scenarios.append(('generate-' + name, self.generate, (path,)))
+
+        return scenarios
+
+    def run_once(self, func, args, trace=False):
+        """
+        Run scenario once in clean directory.
+
+        :param func: Scenario
+        :param args: Scenario args
+        :param trace: Measure peak memory
+        """
+        path = tempfile.mkdtemp(dir=self.work_path)
+        cwd = os.getcwd()
+        stdout = sys.stdout
+        os.chdir(path)
+        sys.stdout = io.StringIO() if sys.version_info[0] > 2 else \
+            io.BytesIO()
+        try:
+            if trace:
+                tracemalloc.start()
+            start = default_timer()
+            func(path, *args)
+            elapsed = default_timer() - start
+            peak = None
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        finally:
+            sys.stdout = stdout
+            os.chdir(cwd)
+
+        files, size = measure_tree(path)
+        shutil.rmtree(path)
+
+        return elapsed, files, size, peak
+
+    def run(self, only=None):
+        """
+        Run all scenarios.
+
+        :param only: Run scenarios which name starts with
+        """
+        results = {}
+        for name, func, args in self.scenarios():
+            if only is not None and not name.startswith(only):
+                continue
+
+            times = []
+            for i in range(self.repeat):
+                elapsed, files, size, peak = self.run_once(func, args)
+                times.append(elapsed)
+
+            peak = None
+            if tracemalloc is not None:
+                peak = self.run_once(func, args, trace=True)[3]
+
+            times.sort()
+            best = times[0]
+            results[name] = {
+                'min': best,
+                'median': times[len(times) // 2],
+                'files': files,
+                'bytes': size,
+                'files_per_sec': files / best if best else None,
+                'peak_memory': peak
+            }
+            output(format_result(name, results[name]))
+
+        return results
+
+    def close(self):
+        shutil.rmtree(self.work_path)
+
+
+def format_result(name, result, baseline=None):
+    """
+    Format result line.
+
+    :param name: Scenario name
+    :param result: Result
+    :param baseline: Baseline result to compare
+    """
+    peak = result['peak_memory']
+    peak = '-' if peak is None else '{0:.1f}MB'.format(peak / 1048576.0)
+    line = '{0:<28} {1:>9.2f}ms {2:>9.2f}ms {3:>6} files {4:>10.0f} files/s ' \
+           '{5:>9.1f}KB {6:>8}'.format(
+               name, result['min'] * 1000, result['median'] * 1000,
+               result['files'], result['files_per_sec'] or 0,
+               result['bytes'] / 1024.0, peak
+           )
+    if baseline is None:
+        return line
+
+    ratio = result['min'] / baseline['min']
+    color = green if ratio <= 1.0 else red
+
+    return '{0} {1}'.format(line, color('x{0:.2f}'.format(ratio)))
+
+
+def parse_options(cmdline=None):
+    """ Parse options. """
+    parser = ArgumentParser(description='Benchmark generator')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='Number of runs per scenario')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of parallel jobs')
+    parser.add_argument('-s', '--scenario',
+                        help='Run scenarios which name starts with')
+    parser.add_argument('--save', help='Save results to JSON file')
+    parser.add_argument('--compare', help='Compare with saved JSON file')
+
+    return parser.parse_args(cmdline)
+
+
+def main(cmdline=None):
+    """ Run benchmarks. """
+    options = parse_options(cmdline)
+
+    baseline = None
+    if options.compare is not None:
+        with io.open(options.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    header = '{0:<28} {1:>11} {2:>11} {3:>12} {4:>18} {5:>11} {6:>8}'
+    output(grey(header.format('scenario', 'min', 'median', 'files', 'rate',
+                              'written', 'peak')))
+
+    bench = Benchmark(repeat=options.repeat, jobs=options.jobs)
+    try:
+        results = bench.run(options.scenario)
+    finally:
+        bench.close()
+
+    if baseline is not None:
+        output(grey('Compare with {0}'.format(options.compare)))
+        for name in sorted(results):
+            if name in baseline:
+                output(format_result(name, results[name], baseline[name]))
+
+    if options.save is not None:
+        dirname = os.path.dirname(os.path.abspath(options.save))
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        data = {
+            'version': RESULT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': options.repeat,
+            'jobs': options.jobs,
+            'results': results
+        }
+        with io.open(options.save, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, indent=2, sort_keys=True))
+        output(green('Save results to {0}'.format(options.save)))
+
+
+if __name__ == '__main__':
+    main()
@@ -13,24 +13,61 @@
     :copyright: (c) 2016 Shinya Ohyanagi, All rights reserved.
     :license: BSD, see LICENSE for more details.
 """
+import io
 import os
+import json
 import sys
 import re
-import shutil
 from datetime import datetime
 from argparse import ArgumentParser
 
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    #: Python2 needs `futures` package.
+    ThreadPoolExecutor = None
+
 if sys.version_info[0] == 2:
-    from _compat import iteritems
+    from _compat import text_type
+    from _output import FileSystemOutput, TarOutput, ZipOutput
+    from _template import TemplateCache, digest
 else:
     try:
-        from _compat import iteritems
+        from _compat import text_type
+        from _output import FileSystemOutput, TarOutput, ZipOutput
+        from _template import TemplateCache, digest
     except ModuleNotFoundError:
-        from ._compat import iteritems
+        from ._compat import text_type
+        from ._output import FileSystemOutput, TarOutput, ZipOutput
+        from ._template import TemplateCache, digest
 
 
 __version__ = '0.5.7'
 
+#: Batch resource kinds.
+#: kind: (category, file name, template, test file name)
+RESOURCES = {
+    'view': ('views', '{0}', None, 'views/{0}'),
+    'rest': ('views', '{0}', 'rest.py_tmpl', 'views/{0}'),
+    'model': ('models', '{0}', None, 'models/{0}'),
+    'entity': ('models', 'entities/{0}', 'models_entity.py_tmpl',
+               'models/entities/{0}'),
+    'form': ('forms', '{0}', None, 'forms/{0}'),
+    'test': ('tests', '{0}', None, None)
+}
+
+#: Lock file name which records generated files.
+LOCK = '.gene.json'
+
+#: Bump when format of lock file changed.
+LOCK_VERSION = 1
+
+#: Templates manifest file name.
+MANIFEST = 'manifest.json'
+
+#: Bump when format of manifest changed.
+MANIFEST_VERSION = 1
+
 
 def red(msg):
     """
@@ -73,15 +110,25 @@ class GeneratorError(Exception):
 
 
 class Generator(object):
-    def __init__(self, file_path=None, author=None):
+    def __init__(self, file_path=None, author=None, cache_dir=None, jobs=1,
+                 executor=None, link=False, output=None):
         """
         Initialize.
           - Set templates path
           - Set year
           - Set default author name
+          - Set compiled template cache
+          - Set parallel jobs
+          - Set output backend
 
         :param file_path: File path
         :param author: Author name
+        :param cache_dir: Directory to cache compiled templates
+        :param jobs: Number of parallel jobs
+        :param executor: :class:`concurrent.futures.Executor` to use
+        :param link: Hardlink binary assets instead of copy,
+                     unsafe if linked files are edited in place
+        :param output: Output backend, default is `FileSystemOutput`
         """
         dirname = os.path.dirname
         current_path = dirname(os.path.abspath(__file__))
@@ -104,11 +151,41 @@ class Generator(object):
 
         self.author = author
 
+        if cache_dir is None:
+            #: If cache_dir did'nt set, use `env` GENE_CACHE_DIR.
+            cache_dir = os.environ.get('GENE_CACHE_DIR')
+
+        self.cache = TemplateCache(cache_dir)
+        self.jobs = jobs
+        self.executor = executor
+        if output is None:
+            output = FileSystemOutput(file_path, link=link)
+
+        self.output = output
+        self.stats = {'copied': 0, 'linked': 0}
+        self.manifest = None
+        self.upgrade = False
+        self.lock = self.build_lock()
+
     def parse_options(self, cmdline=None):
         """ Parse options. """
         parser = ArgumentParser(description='Flask builder', add_help=True)
         parser.add_argument('-p', '--project-name', help='Create project')
         parser.add_argument('-u', '--author-name', help='Author name')
+        parser.add_argument('--upgrade', action='store_true',
+                            help='Re-apply templates to existing project')
+        parser.add_argument('-j', '--jobs', type=int, default=1,
+                            help='Number of parallel jobs')
+        parser.add_argument('-o', '--output', default='fs',
+                            choices=['fs', 'tar', 'zip'],
+                            help='Write files or stream archive to stdout')
+        parser.add_argument('--link', action='store_true',
+                            help='Hardlink binary assets instead of copy, '
+                                 'editing them in place edits templates')
+        parser.add_argument('--cache-dir',
+                            help='Directory to cache compiled templates')
+        parser.add_argument('--build-manifest', action='store_true',
+                            help='Build templates manifest')
         parser.add_argument('--version', action='version',
                             version='%(prog)s 1.0')
 
@@ -127,33 +204,250 @@ class Generator(object):
 
         return separator
 
-    def render_template(self, file_path, **kwargs):
+    def map(self, func, *iterables):
         """
-        Render template.
+        Apply function to every item.
+
+        If executor or jobs set, fan out to the pool.
+        Results are returned in the order of the given items.
 
-        :param file_path: Path to template file.
-        :param **kwargs: Template vars
+        :param func: Function
+        :param *iterables: Arguments of function
         """
-        tmpl = None
-        if file_path.endswith('_tmpl'):
-            _path = file_path.replace('_tmpl', '')
-            os.rename(file_path, _path)
-            file_path = _path
+        args = [list(i) for i in iterables]
+        if self.executor is not None:
+            return list(self.executor.map(func, *args))
 
-        #: Template variable {{foo}}
-        with open(file_path, 'r') as f:
-            tmpl = f.read()
-            for k, v in iteritems(kwargs):
-                #: Equivalent to `{{%s}} % k`.
-                #: Should use String.template?
-                var = '{{{}}}'.format(k)
-                tmpl = tmpl.replace('{{{0}}}'.format(var), v)
+        if self.jobs > 1 and ThreadPoolExecutor is not None:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                return list(executor.map(func, *args))
 
-        if tmpl is None:
-            return
+        return [func(*a) for a in zip(*args)]
+
+    def relpath(self, path):
+        """
+        Convert path to name relative to output root.
+
+        :param path: Path
+        """
+        path = os.path.relpath(path, self.file_path)
+
+        return path.replace(os.sep, '/')
+
+    def render_file(self, src, name, template_var):
+        """
+        Render template file to output.
+
+        :param src: Path to template file.
+        :param name: Rendered file name relative to output root.
+        :param template_var: Template vars
+        """
+        with open(src, 'rb') as f:
+            data = f.read()
+
+        path = os.path.relpath(src, self.tmpl_path)
+        tmpl = self.cache.render(path, data, template_var).encode('utf-8')
+        self.output.write(name, tmpl, os.stat(src).st_mode)
+
+        return digest(tmpl)
+
+    def build_manifest(self):
+        """
+        Build templates manifest.
+
+        Walk templates directory and collect path, package, kind and sha1
+        of every file. Package is relative to top directory
+        (`app`, `data`, ...), so add project name to use it.
+        """
+        files = []
+        for root, dirs, fnames in os.walk(self.tmpl_path):
+            dirs[:] = [d for d in dirs if d != '__pycache__']
+            rel_root = os.path.relpath(root, self.tmpl_path)
+            top = rel_root.split(os.sep)[0]
+            top_path = os.path.join(self.tmpl_path, top)
+            for fname in fnames:
+                path = os.path.normpath(os.path.join(rel_root, fname))
+                if path == MANIFEST or fname.endswith(('.pyc', '.pyo')):
+                    continue
+
+                package = None
+                kind = 'static'
+                if fname.endswith('_tmpl'):
+                    kind = 'template'
+                    if rel_root != os.curdir:
+                        package = self.build_package_path('', root, top_path,
+                                                          fname)
+
+                with open(os.path.join(root, fname), 'rb') as f:
+                    sha1 = digest(f.read())
+
+                files.append({
+                    'path': path.replace(os.sep, '/'),
+                    'package': package,
+                    'kind': kind,
+                    'sha1': sha1
+                })
+
+        files.sort(key=lambda x: x['path'])
+
+        return {'version': MANIFEST_VERSION, 'files': files}
+
+    def write_manifest(self):
+        """ Write templates manifest to templates directory. """
+        manifest = self.build_manifest()
+        path = os.path.join(self.tmpl_path, MANIFEST)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(text_type(json.dumps(manifest, indent=2, sort_keys=True)))
+            f.write(text_type('\n'))
+
+        self.manifest = manifest
+
+        return path
+
+    def load_manifest(self):
+        """
+        Load templates manifest.
+
+        If manifest.json does not exist, build it from templates directory.
+        """
+        if self.manifest is not None:
+            return self.manifest
+
+        path = os.path.join(self.tmpl_path, MANIFEST)
+        manifest = None
+        if os.path.exists(path):
+            with io.open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+        if manifest is None or manifest.get('version') != MANIFEST_VERSION:
+            manifest = self.build_manifest()
+
+        self.manifest = manifest
+
+        return manifest
+
+    def build_tree(self, project_name, name, dst):
+        """
+        Build files to generate from templates manifest.
+
+        Files are classified by manifest.
+        `template` files have template vars, `static` files have None.
+
+        :param project_name: Project name
+        :param name: Template directory name
+        :param dst: Destination directory name relative to output root
+        """
+        project_root = os.path.dirname(os.path.join(self.file_path, dst))
+        prefix = name + '/'
+        files = []
+        for entry in self.load_manifest()['files']:
+            if not entry['path'].startswith(prefix):
+                continue
+
+            rel_path = entry['path'][len(prefix):]
+            src = os.path.join(self.tmpl_path, name, *rel_path.split('/'))
+            path = '{0}/{1}'.format(dst, rel_path)
+            template_var = None
+            if entry['kind'] == 'template':
+                package = project_name + entry['package']
+                template_var = self.build_template_var(project_name, package,
+                                                       project_root)
+                path = path.replace('_tmpl', '')
+
+            files.append((src, path, entry['sha1'], template_var))
+
+        return files
+
+    def generate(self, files):
+        """
+        Generate files.
+
+        Directories are created first,
+        then files are generated by `map()`.
+
+        :param files: List of (src, name, sha1, template vars)
+        """
+        dirs = set(name.rsplit('/', 1)[0] for src, name, sha1, v in files
+                   if '/' in name)
+        for d in sorted(dirs):
+            self.output.makedirs(d)
+
+        results = self.map(self.generate_file, *zip(*files))
+        for (src, name, sha1, v), (status, record, size) in zip(files,
+                                                                results):
+            if status in self.stats:
+                self.stats[status] += size
+            if status == 'modified':
+                output(grey('Skip {0}, it was modified.'.format(name)))
+            else:
+                self.lock['files'][name] = record
+
+        return results
+
+    def generate_file(self, src, name, sha1, template_var):
+        """
+        Generate a file.
+
+        When `upgrade` enabled, unchanged files are skipped and
+        files which were modified after generation are never overwritten.
+
+        Return status, lock record and size.
 
-        with open(file_path, 'w') as f:
-            f.write(tmpl)
+        :param src: Template path
+        :param name: File name relative to output root
+        :param sha1: Template sha1
+        :param template_var: Template vars, None for static file
+        """
+        record = {'source': sha1, 'vars': None}
+        if template_var is not None:
+            context = json.dumps(template_var, sort_keys=True)
+            record['vars'] = digest(context.encode('utf-8'))
+
+        old = self.lock['files'].get(name)
+        if self.upgrade and self.output.exists(name):
+            if old is not None and old['source'] == record['source'] and \
+                    old['vars'] == record['vars']:
+                return 'unchanged', old, 0
+
+            current = digest(self.output.read(name))
+            if old is None or current != old['output']:
+                return 'modified', old, 0
+
+        if template_var is None:
+            status, size = self.output.copy(src, name)
+            record['output'] = sha1
+        else:
+            status = 'rendered'
+            size = 0
+            record['output'] = self.render_file(src, name, template_var)
+
+        return status, record, size
+
+    def build_lock(self):
+        """ Build empty lock which records generated files. """
+        return {
+            'version': LOCK_VERSION,
+            'year': self.year,
+            'author': self.author,
+            'files': {}
+        }
+
+    def load_lock(self):
+        """ Load lock file which records generated files. """
+        self.lock = self.build_lock()
+        if not self.output.exists(LOCK):
+            return self.lock
+
+        lock = json.loads(self.output.read(LOCK).decode('utf-8'))
+        if lock.get('version') == LOCK_VERSION:
+            self.lock = lock
+
+        return self.lock
+
+    def write_lock(self):
+        """ Write lock file which records generated files. """
+        data = json.dumps(self.lock, indent=2, sort_keys=True)
+        self.output.write(LOCK, (data + '\n').encode('utf-8'))
 
     def validate_name(self, name):
         """
@@ -182,7 +476,7 @@ class Generator(object):
         :param path: Directory/File path
         :param file_name: File name
         """
-        if os.path.exists(os.path.join(path, file_name)):
+        if self.output.exists(self.relpath(os.path.join(path, file_name))):
             error = red('{0} already exists in {1}'.format(file_name, path))
             raise GeneratorError(error)
 
@@ -208,53 +502,54 @@ class Generator(object):
 
         return tmpl
 
-    def recrsive(self, project_name, project_path, project_root=None):
+    def build_template_var(self, project_name, package, project_root):
         """
-        Recrsive files.
+        Build template vars for project file.
 
         :param project_name: Project name
-        :param project_path: Project path
+        :param package: Package path
         :param project_root: Project root path
         """
-        if project_root is None:
-            project_root = os.path.dirname(project_path)
+        separator = self.build_line_separator(package)
 
-        for root, dirs, files in os.walk(project_path):
-            for fname in files:
-                if fname.endswith('_tmpl'):
-                    package = self.build_package_path(project_name, root,
-                                                      project_path, fname)
-                    separator = self.build_line_separator(package)
-
-                    template_var = {
-                        'package': package,
-                        'separator': separator,
-                        'project_root': project_root,
-                        'project': project_name,
-                        'project_upper': project_name.upper(),
-                        'project_title': project_name.title(),
-                        'year': self.year,
-                        'author': self.author
-                    }
-                    self.render_template(os.path.join(root, fname),
-                                         **template_var)
-
-    def create_project(self, project_name):
+        return {
+            'package': package,
+            'separator': separator,
+            'project_root': project_root,
+            'project': project_name,
+            'project_upper': project_name.upper(),
+            'project_title': project_name.title(),
+            'year': self.year,
+            'author': self.author
+        }
+
+    def create_project(self, project_name, upgrade=False):
         """
         Create project.
 
+        If `upgrade` enabled, re-apply templates to the existing project.
+        Only files whose template or template vars changed are generated
+        and files modified by user are kept.
+
         :param project_name: Project name
+        :param upgrade: Upgrade existing project
         """
         self.validate_name(project_name)
-        self.validate_exists(self.file_path, project_name)
+        self.upgrade = upgrade
+        self.stats = {'copied': 0, 'linked': 0}
+        if upgrade:
+            #: Keep year and author which project was generated.
+            lock = self.load_lock()
+            self.year = lock['year']
+            self.author = lock['author']
+        else:
+            self.validate_exists(self.file_path, project_name)
+            self.lock = self.build_lock()
 
         #: Copy project templates.
         create_message = 'Creating {0} to {1}'
         output(green(create_message.format(project_name, self.file_path)))
-        shutil.copytree(os.path.join(self.tmpl_path, 'app'), project_name)
-        project_path = os.path.join(self.file_path, project_name)
-
-        self.recrsive(project_name, project_path)
+        files = self.build_tree(project_name, 'app', project_name)
 
         default_files = [
             'babel.cfg_tmpl',
@@ -267,13 +562,11 @@ class Generator(object):
             'tox.ini_tmpl',
             'setup.cfg_tmpl'
         ]
+        manifest = dict((e['path'], e) for e in self.load_manifest()['files'])
         for fname in default_files:
-            src = os.path.join(self.tmpl_path, fname)
-            dst = os.path.join(self.file_path, fname)
             package = fname.replace('_tmpl', '')
 
             output(green(create_message.format(package, self.file_path)))
-            shutil.copy(src, dst)
             separator = self.build_line_separator(project_name)
             template_var = {
                 'package': package,
@@ -284,28 +577,43 @@ class Generator(object):
                 'year': self.year,
                 'author': self.author
             }
-            self.render_template(dst, **template_var)
+            files.append((os.path.join(self.tmpl_path, fname), package,
+                          manifest[fname]['sha1'], template_var))
 
         # Create docs, logs directoire.
         dirs = ['docs', 'logs', 'var/run']
         for d in dirs:
-            path = os.path.join(self.file_path, d)
+            if upgrade and self.output.exists(d):
+                continue
             if self.validate_exists(self.file_path, d):
                 continue
 
             output(green(create_message.format(d, self.file_path)))
-            os.makedirs(path)
+            self.output.makedirs(d)
 
         # Copy data directory.
-        if self.validate_exists(self.file_path, 'data'):
+        if not upgrade and self.validate_exists(self.file_path, 'data'):
             return
 
         output(green(create_message.format('data', self.file_path)))
 
         for d in ['data', 'requirements']:
-            dst = os.path.join(self.file_path, d)
-            shutil.copytree(os.path.join(self.tmpl_path, d), dst)
-            self.recrsive(project_name, dst)
+            files.extend(self.build_tree(project_name, d, d))
+
+        results = self.generate(files)
+        self.write_lock()
+
+        msg = 'Static files: {0} bytes copied, {1} bytes linked.'
+        output(grey(msg.format(self.stats['copied'], self.stats['linked'])))
+        if upgrade:
+            statuses = [status for status, record, size in results]
+            unchanged = statuses.count('unchanged')
+            modified = statuses.count('modified')
+            generated = len(statuses) - unchanged - modified
+            msg = '{0} files generated, {1} unchanged, {2} modified.'
+            output(grey(msg.format(generated, unchanged, modified)))
+            output(green('Upgrade project success.'))
+            return
 
         output(green('Create project success.'))
         msg = 'Type pip install -r requirement.txt to install packages.'
@@ -321,7 +629,8 @@ class Generator(object):
         """
         self.validate_name(file_name)
         file_path = os.path.join(self.file_path, project_name, category)
-        self.validate_exists(file_path, file_name + '.py')
+        self.validate_exists(file_path,
+                             self.build_file_name(file_name, category))
         items = file_name.split('/')
         class_name = items[-1]
         if category == 'tests':
@@ -336,12 +645,11 @@ class Generator(object):
             directory = os.path.join(self.file_path, project_name,
                                      category, directory_name)
 
-            if not os.path.exists(directory):
-                os.makedirs(directory)
+            directory = self.relpath(directory)
+            if not self.output.exists(directory):
+                self.output.makedirs(directory)
                 tmpl_init = os.path.join(self.tmpl_path, '__init__.py')
-
-                for root, dirs, files in os.walk(directory):
-                    shutil.copy(tmpl_init, os.path.join(root, '__init__.py'))
+                self.output.copy(tmpl_init, directory + '/__init__.py')
 
         output(green('Creating {0}'.format(file_path)))
         package = '{0}/{1}/{2}'.format(project_name, category, directory_name)
@@ -350,7 +658,6 @@ class Generator(object):
         if src is None:
             src = os.path.join(self.tmpl_path, category + '.py_tmpl')
 
-        shutil.copy(src, file_path)
         separator = self.build_line_separator(package + '.' + items[-1])
         template_var = {
             'package': package,
@@ -363,7 +670,22 @@ class Generator(object):
             'author': self.author,
             'module': directory_name.replace('/', '.')
         }
-        self.render_template(file_path, **template_var)
+        self.render_file(src, self.relpath(file_path), template_var)
+
+    def build_file_name(self, file_name, category):
+        """
+        Build path of file in category directory.
+
+        Test files are prefixed by `test_`.
+
+        :param file_name: File name
+        :param category: Category name
+        """
+        items = file_name.split('/')
+        if category == 'tests':
+            items[-1] = 'test_{0}'.format(items[-1])
+
+        return '/'.join(items) + '.py'
 
     def create_view(self, project_name, file_name):
         """
@@ -421,6 +743,131 @@ class Generator(object):
         """
         self.create_file(project_name, file_name, category='tests')
 
+    def load_resources(self, path):
+        """
+        Load batch resources from JSON, JSONL or YAML file.
+
+        Each resource is a dict which has `kind` and `name`.
+
+        .. code:: json
+
+          [
+            {"kind": "rest", "name": "api/users"},
+            {"kind": "entity", "name": "user"}
+          ]
+
+        :param path: Path to resources file
+        """
+        with io.open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.jsonl'):
+                return [json.loads(line) for line in f if line.strip()]
+
+            if path.endswith(('.yml', '.yaml')):
+                try:
+                    import yaml
+                except ImportError:
+                    raise GeneratorError(red('Install PyYAML to load YAML.'))
+                return yaml.safe_load(f) or []
+
+            return json.load(f)
+
+    def build_batch_files(self, resource):
+        """
+        Build files to create from batch resource.
+
+        :param resource: Resource dict
+        """
+        if not isinstance(resource, dict):
+            msg = '{0!r} is not a valid resource. Please use a dict.'
+            raise GeneratorError(red(msg.format(resource)))
+
+        kind = resource.get('kind')
+        name = resource.get('name', '')
+        if not isinstance(name, (str, text_type)):
+            msg = '{0!r} is not a valid file name. Please use a string.'
+            raise GeneratorError(red(msg.format(name)))
+
+        if not isinstance(kind, (str, text_type)) or kind not in RESOURCES:
+            msg = '{0} is not a valid kind. Please use one of {1}.'
+            kinds = ', '.join(sorted(RESOURCES))
+            raise GeneratorError(red(msg.format(kind, kinds)))
+
+        category, file_name, tmpl, test_name = RESOURCES[kind]
+        src = None
+        if tmpl is not None:
+            src = os.path.join(self.tmpl_path, tmpl)
+
+        files = [(file_name.format(name), category, src)]
+        if test_name is not None:
+            files.append((test_name.format(name), 'tests', None))
+
+        return files
+
+    def create_batch(self, project_name, resources):
+        """
+        Create files from batch resources in one process.
+
+        All names are validated before any file is created and
+        directories are created before files.
+
+        :param project_name: Project name
+        :param resources: List of resource dict
+        """
+        if not isinstance(resources, list):
+            raise GeneratorError(red('Resources should be a list.'))
+
+        files = []
+        errors = []
+        seen = set()
+        for resource in resources:
+            try:
+                for file_name, category, src in \
+                        self.build_batch_files(resource):
+                    key = (category, file_name)
+                    if key in seen:
+                        msg = '{0} is duplicated in {1}'
+                        raise GeneratorError(red(msg.format(file_name,
+                                                            category)))
+                    seen.add(key)
+                    self.validate_name(file_name)
+                    self.validate_exists(
+                        os.path.join(self.file_path, project_name, category),
+                        self.build_file_name(file_name, category)
+                    )
+                    files.append((file_name, category, src))
+            except GeneratorError as e:
+                errors.append(str(e))
+
+        if errors:
+            raise GeneratorError('\n'.join(errors))
+
+        #: Create all package directories at once.
+        directories = set()
+        for file_name, category, src in files:
+            items = file_name.split('/')
+            for i in range(len(items)):
+                directories.add('/'.join([project_name, category] + items[:i]))
+
+        tmpl_init = os.path.join(self.tmpl_path, '__init__.py')
+        for directory in sorted(directories):
+            if not self.output.exists(directory):
+                self.output.makedirs(directory)
+                self.output.copy(tmpl_init, directory + '/__init__.py')
+
+        for file_name, category, src in files:
+            self.create_file(project_name, file_name, category, src=src)
+
+        routings = [
+            '{0}.views.{1}'.format(project_name, r['name']).replace('/', '.')
+            for r in resources if r['kind'] in ('view', 'rest')
+        ]
+        if routings:
+            output(green('-' * 80))
+            output(green('Add routing to views/__init__.py'))
+            for routing in routings:
+                output(green('  {0}'.format(routing)))
+            output(green('-' * 80))
+
     def output_error(self, msg):
         """
         Output error message.
@@ -435,14 +882,37 @@ class Generator(object):
         if parser.author_name is not None:
             self.author = parser.author_name
 
+        if parser.cache_dir is not None:
+            self.cache = TemplateCache(parser.cache_dir)
+
+        self.jobs = parser.jobs
+
+        if parser.build_manifest:
+            path = self.write_manifest()
+            output(green('Write manifest to {0}'.format(path)))
+            return
+
         if parser.project_name is None:
             return
 
+        if parser.output == 'fs':
+            self.output = FileSystemOutput(self.file_path, link=parser.link)
+        else:
+            #: Archive is streamed to stdout, so messages go to stderr.
+            stream = getattr(sys.stdout, 'buffer', sys.stdout)
+            sys.stdout = sys.stderr
+            if parser.output == 'tar':
+                self.output = TarOutput(stream)
+            else:
+                self.output = ZipOutput(stream)
+
         project_name = parser.project_name
         try:
-            self.create_project(project_name)
+            self.create_project(project_name, upgrade=parser.upgrade)
         except Exception as e:
             output(e.message)
+        finally:
+            self.output.close()
 
 
 if __name__ == '__main__':
@@ -25,8 +25,7 @@ require.config({
     'backbone':   'libs/backbone-1.0.0-min',
     'text':       'libs/text-2.0.7',
     'log':        'libs/micro-log-0.0.1'
-  },
-  urlArgs: 'bust=' +  (new Date()).getTime()
+  }
 });
 
 require([
@@ -11,12 +11,17 @@
 """
 import os
 import sys
+import json
 import shutil
+import tarfile
+from io import BytesIO
 from os.path import dirname, join, exists
 from datetime import datetime
 from unittest import TestCase
 from manage import Generator, GeneratorError
 from _compat import to_unicode
+from _output import MemoryOutput, TarOutput
+from _template import compile_template, render_segments, TemplateCache
 
 if sys.version_info[0] == 2:
     from cStringIO import StringIO
@@ -112,6 +117,11 @@ class TestsGenrator(TestCase):
         self.assertEqual(parsed.project_name, 'testproject')
         self.assertEqual(parsed.author_name, 'test user')
 
+    def test_parse_jobs_option(self):
+        """ Should parse jobs option. """
+        parsed = self.app.parse_options(['--jobs=4'])
+        self.assertEqual(parsed.jobs, 4)
+
     def test_parse_short_options(self):
         """ Should parse short options. """
         parsed = self.app.parse_options([
@@ -138,6 +148,26 @@ class TestsGenrator(TestCase):
 
         self.assertEqual(ret, 'testproject.views.frontend.index')
 
+    def test_manifest_should_be_up_to_date(self):
+        """ Should ship manifest which matches templates. """
+        path = join(self.current_path, 'templates', 'manifest.json')
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+
+        self.assertEqual(manifest, self.app.build_manifest())
+
+    def test_should_classify_manifest_files(self):
+        """ Should classify templates and static files in manifest. """
+        files = dict((e['path'], e) for e in self.app.load_manifest()['files'])
+
+        entry = files['app/views/frontend/index.py_tmpl']
+        self.assertEqual(entry['kind'], 'template')
+        self.assertEqual(entry['package'], '.views.frontend.index')
+
+        entry = files['app/static/js/main.js']
+        self.assertEqual(entry['kind'], 'static')
+        self.assertIsNone(entry['package'])
+
     def test_should_create_project(self):
         """ Should create testproject. """
         os.chdir(self.var_path)
@@ -158,6 +188,136 @@ class TestsGenrator(TestCase):
         self.assertTrue(exists(join(self.var_path, 'var')))
         self.assertTrue(exists(join(self.var_path, 'tox.ini')))
 
+    def test_should_create_project_in_parallel(self):
+        """ Should create testproject by parallel jobs. """
+        os.chdir(self.var_path)
+        app = Generator(self.var_path, jobs=4)
+
+        with HookStdOut() as hook:
+            app.create_project('testproject')
+            messages = hook.dump()
+
+        view_path = join(self.var_path, 'testproject',
+                         'views', 'frontend', 'index.py')
+        with open(view_path, 'rb') as f:
+            lines = f.readlines()
+            self.assertEqual(to_unicode(lines[2].lstrip().rstrip()),
+                             'testproject.views.frontend.index')
+
+        self.assertTrue(exists(join(self.var_path, 'data', 'sql',
+                                    'database.sql')))
+        self.assertTrue(exists(join(self.var_path, 'setup.py')))
+        self.assertTrue(messages.index('babel.cfg') <
+                        messages.index('LICENSE.txt') <
+                        messages.index('setup.cfg'))
+
+    def test_should_link_static_files(self):
+        """ Should hardlink static files when link enabled. """
+        os.chdir(self.var_path)
+        app = Generator(self.var_path, link=True)
+
+        with HookStdOut():
+            app.create_project('testproject')
+
+        path = join('static', 'img', 'glyphicons-halflings.png')
+        src = os.stat(join(self.current_path, 'templates', 'app', path))
+        dst = os.stat(join(self.var_path, 'testproject', path))
+        self.assertEqual((src.st_dev, src.st_ino), (dst.st_dev, dst.st_ino))
+        self.assertTrue(app.stats['linked'] > 0)
+
+        #: Text files could be edited, they should not share inode.
+        path = join('static', 'js', 'main.js')
+        src = os.stat(join(self.current_path, 'templates', 'app', path))
+        dst = os.stat(join(self.var_path, 'testproject', path))
+        self.assertNotEqual(src.st_ino, dst.st_ino)
+
+    def test_should_count_static_file_bytes(self):
+        """ Should count bytes of copied and linked static files. """
+        os.chdir(self.var_path)
+        with HookStdOut():
+            self.app.create_project('testproject')
+
+        size = 0
+        for d in ['app', 'data']:
+            for root, dirs, files in os.walk(join(self.current_path,
+                                                  'templates', d)):
+                for fname in files:
+                    if not fname.endswith('_tmpl'):
+                        size += os.path.getsize(join(root, fname))
+
+        stats = self.app.stats
+        self.assertEqual(stats['copied'] + stats['linked'], size)
+
+    def test_should_create_project_in_memory(self):
+        """ Should create testproject without touching disk. """
+        output = MemoryOutput()
+        app = Generator(self.var_path, output=output)
+
+        with HookStdOut():
+            app.create_project('testproject')
+            app.create_view('testproject', 'frontend/sample')
+
+        self.assertEqual(os.listdir(self.var_path), [])
+        self.assertTrue('manage.py' in output.files)
+        self.assertTrue('data/sql/database.sql' in output.files)
+        self.assertTrue('docs' in output.dirs)
+        self.assertTrue('testproject/views/frontend/sample.py' in output.files)
+
+        data = output.files['testproject/views/frontend/index.py']
+        lines = data.split(b'\n')
+        self.assertEqual(to_unicode(lines[2].strip()),
+                         'testproject.views.frontend.index')
+
+    def test_should_create_project_to_tar_stream(self):
+        """ Should stream testproject as tar archive. """
+        fp = BytesIO()
+        app = Generator(self.var_path, output=TarOutput(fp))
+
+        with HookStdOut():
+            app.create_project('testproject')
+        app.output.close()
+
+        self.assertEqual(os.listdir(self.var_path), [])
+        fp.seek(0)
+        with tarfile.open(fileobj=fp) as tar:
+            names = tar.getnames()
+            data = tar.extractfile('testproject/app.py').read()
+
+        self.assertTrue('testproject/static/js/main.js' in names)
+        self.assertTrue('testproject/app.py_tmpl' not in names)
+        self.assertEqual(to_unicode(data.split(b'\n')[2].strip()),
+                         'testproject.app')
+
+    def test_should_upgrade_project(self):
+        """ Should re-apply only changed templates to unmodified files. """
+        output = MemoryOutput()
+        with HookStdOut():
+            Generator(self.var_path, output=output).create_project(
+                'testproject'
+            )
+
+        app = Generator(self.var_path, author='foo', output=output)
+        for entry in app.load_manifest()['files']:
+            if entry['path'] in ('app/app.py_tmpl', 'app/errors.py_tmpl'):
+                entry['sha1'] = 'changed'
+        output.files['testproject/errors.py'] = b'modified by user'
+
+        with HookStdOut() as hook:
+            app.create_project('testproject', upgrade=True)
+            messages = hook.dump()
+
+        self.assertTrue('1 files generated' in messages)
+        self.assertTrue('Skip testproject/errors.py' in messages)
+        self.assertEqual(output.files['testproject/errors.py'],
+                         b'modified by user')
+
+        lock = json.loads(to_unicode(output.files['.gene.json']))
+        self.assertEqual(lock['author'], os.environ['USER'])
+        self.assertEqual(lock['files']['testproject/app.py']['source'],
+                         'changed')
+        self.assertNotEqual(lock['files']['testproject/errors.py']['source'],
+                            'changed')
+
     def test_should_create_view(self):
         """ Should create view file. """
         with HookStdOut():
@@ -195,6 +355,83 @@ class TestsGenrator(TestCase):
         self.assertTrue(exists(join(expected, 'test_sample.py')))
         self.assertTrue(exists(join(expected, '__init__.py')))
 
+    def test_should_load_resources(self):
+        """ Should load batch resources from JSON and JSONL. """
+        resources = [{'kind': 'rest', 'name': 'api/users'},
+                     {'kind': 'entity', 'name': 'user'}]
+        path = join(self.var_path, 'resources.json')
+        with open(path, 'w') as f:
+            json.dump(resources, f)
+        self.assertEqual(self.app.load_resources(path), resources)
+
+        path = join(self.var_path, 'resources.jsonl')
+        with open(path, 'w') as f:
+            f.write('\n'.join(json.dumps(r) for r in resources))
+        self.assertEqual(self.app.load_resources(path), resources)
+
+    def test_should_create_batch(self):
+        """ Should create files from batch resources. """
+        resources = [{'kind': 'rest', 'name': 'api/users'},
+                     {'kind': 'entity', 'name': 'user'},
+                     {'kind': 'form', 'name': 'user'}]
+        with HookStdOut():
+            self.app.create_batch('testproject', resources)
+
+        expected = join(self.var_path, 'testproject')
+        self.assertTrue(exists(join(expected, 'views', 'api', 'users.py')))
+        self.assertTrue(exists(join(expected, 'models', 'entities',
+                                    'user.py')))
+        self.assertTrue(exists(join(expected, 'tests', 'views', 'api',
+                                    'test_users.py')))
+        self.assertTrue(exists(join(expected, 'tests', 'models', 'entities',
+                                    'test_user.py')))
+
+    def test_should_validate_batch_before_create(self):
+        """ Should not create any file when batch resources are invalid. """
+        resources = [{'kind': 'view', 'name': 'frontend/sample'},
+                     {'kind': 'view', 'name': '0foo'},
+                     {'kind': 'unknown', 'name': 'foo'}]
+        try:
+            self.app.create_batch('testproject', resources)
+            self.fail()
+        except GeneratorError as e:
+            self.assertEqual(len(str(e).split('\n')), 2)
+
+        self.assertFalse(exists(join(self.var_path, 'testproject')))
+
+    def test_should_validate_batch_entry_types(self):
+        """ Should raise GeneratorError for entries which are not dict. """
+        resources = [{'kind': 'view', 'name': 'frontend/sample'},
+                     ['view', 'foo'],
+                     {'kind': 'view', 'name': 1}]
+        try:
+            self.app.create_batch('testproject', resources)
+            self.fail()
+        except GeneratorError as e:
+            self.assertEqual(len(str(e).split('\n')), 2)
+
+        self.assertFalse(exists(join(self.var_path, 'testproject')))
+
+    def test_should_not_overwrite_test_in_batch(self):
+        """ Should not create any file when test file already exists. """
+        with HookStdOut():
+            self.app.create_test('testproject', 'views/frontend/sample')
+
+        test_file = join(self.var_path, 'testproject', 'tests', 'views',
+                         'frontend', 'test_sample.py')
+        with open(test_file, 'w') as f:
+            f.write('# edited')
+
+        resources = [{'kind': 'view', 'name': 'frontend/sample'}]
+        with HookStdOut():
+            self.assertRaises(GeneratorError, self.app.create_batch,
+                              'testproject', resources)
+
+        with open(test_file) as f:
+            self.assertEqual(f.read(), '# edited')
+        self.assertFalse(exists(join(self.var_path, 'testproject', 'views',
+                                     'frontend', 'sample.py')))
+
     def test_should_create_sphinx_header(self):
         """ Should create Sphinx header. """
         os.chdir(self.var_path)
@@ -212,6 +449,55 @@ class TestsGenrator(TestCase):
                              '~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
 
 
+class TestsTemplate(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        current_path = dirname(os.path.abspath(__file__))
+        cls.cache_path = join(current_path, 'var', 'cache')
+
+    def tearDown(self):
+        if os.path.exists(self.cache_path):
+            shutil.rmtree(self.cache_path)
+
+    def test_should_compile_template(self):
+        """ Should compile template to literal and variable segments. """
+        segments = compile_template('{{project}}.app\n{{separator}}\n')
+        self.assertEqual(segments, ['', 'project', '.app\n',
+                                    'separator', '\n'])
+
+    def test_should_render_segments(self):
+        """ Should render compiled segments. """
+        segments = compile_template('{{project}}.{{name}}')
+        ret = render_segments(segments, {'project': 'foo', 'name': 'bar'})
+        self.assertEqual(ret, 'foo.bar')
+
+    def test_should_keep_unknown_variable(self):
+        """ Should keep variable which does not exist in template vars. """
+        segments = compile_template('{{project}} {{ foo }} {{bar}}')
+        ret = render_segments(segments, {'project': 'foo'})
+        self.assertEqual(ret, 'foo {{ foo }} {{bar}}')
+
+    def test_should_cache_compiled_template_to_disk(self):
+        """ Should cache compiled template to disk. """
+        cache = TemplateCache(self.cache_path)
+        ret = cache.render('foo.py_tmpl', b'{{project}}', {'project': 'foo'})
+        self.assertEqual(ret, 'foo')
+        self.assertEqual(len(os.listdir(self.cache_path)), 1)
+
+        cache = TemplateCache(self.cache_path)
+        ret = cache.render('foo.py_tmpl', b'{{project}}', {'project': 'bar'})
+        self.assertEqual(ret, 'bar')
+        self.assertEqual(len(os.listdir(self.cache_path)), 1)
+
+    def test_should_key_cache_by_path_and_content(self):
+        """ Same content of other template should have own cache. """
+        cache = TemplateCache(self.cache_path)
+        cache.render('foo.py_tmpl', b'{{project}}', {'project': 'foo'})
+        cache.render('bar.py_tmpl', b'{{project}}', {'project': 'bar'})
+        cache.render('foo.py_tmpl', b'{{name}}', {'name': 'foo'})
+        self.assertEqual(len(os.listdir(self.cache_path)), 3)
+
+
 if __name__ == '__main__':
     import unittest
     unittest.main()